@@ -13,15 +13,23 @@ def get_client() -> MongoClient:
         with _client_lock:
             if _client is None:
                 max_pool = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
-                min_pool = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+                min_pool = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
                 server_sel_timeout = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
                 connect_timeout = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+                # Compressors are offered to the server in order and the first one
+                # it supports is used. zstd needs the pymongo[zstd] extra; without
+                # it pymongo warns and drops zstd from the list.
+                compressors = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
+                zlib_level = int(os.getenv("MONGO_ZLIB_COMPRESSION_LEVEL", "3"))
                 _client = MongoClient(
                     MONGO_URI,
                     maxPoolSize=max_pool,
                     minPoolSize=min_pool,
                     serverSelectionTimeoutMS=server_sel_timeout,
                     connectTimeoutMS=connect_timeout,
+                    compressors=compressors,
+                    zlibCompressionLevel=zlib_level,
+                    retryWrites=True,
                 )
     return _client
 
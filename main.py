@@ -9,11 +9,12 @@ from routes import balance, redeem, policy
 from routes.karma import router as karma_api_router  # New karma API router
 from routes.rnanubandhan import router as rnanubandhan_router  # Rnanubandhan API router
 from routes.agami import router as agami_router  # Agami Karma API router
-from routes.normalization import router as normalization_router  # Behavioral State Normalization router
+from routes.normalization import router as normalization_router, karma_events_buffer  # Behavioral State Normalization router
 from routes.feedback import router as feedback_router  # Karmic Feedback Engine router
 from routes.analytics import router as analytics_router  # Karmic Analytics router
 # from routes import user, admin  # These modules don't exist yet
 from database import close_client
+from utils.stp_bridge import close_stp_bridge
 import os
 
 @asynccontextmanager
@@ -23,11 +24,18 @@ async def lifespan(app: FastAPI):
     os.makedirs("./analytics_exports", exist_ok=True)
     yield
     # Shutdown
+    # Write out buffered ledger events before the client goes away; close()
+    # logs any documents it could not write
+    await karma_events_buffer.close()
     try:
         close_client()
     except Exception:
         # Avoid raising during shutdown
         pass
+    try:
+        close_stp_bridge()
+    except Exception:
+        pass
 
 app = FastAPI(
     title="KarmaChain v2 (Dual-Ledger)",
@@ -3,17 +3,31 @@ Normalization API Routes
 
 This module provides API endpoints for behavioral state normalization.
 """
+import os
 import uuid
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, Depends
-import json
+from email.message import Message
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.exceptions import RequestValidationError
+import fastjsonschema
+import orjson
 from pydantic import BaseModel
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
 from database import karma_events_col
 from validation_middleware import validation_dependency
+from utils.write_buffer import WriteBuffer
 
 router = APIRouter()
 
+# Single-state ledger writes are buffered and bulk-inserted
+karma_events_buffer = WriteBuffer(
+    karma_events_col,
+    max_size=int(os.getenv("NORMALIZATION_BUFFER_MAX_SIZE", "500")),
+    max_ms=int(os.getenv("NORMALIZATION_BUFFER_MAX_MS", "100"))
+)
+
 class StateSchema(BaseModel):
     """Schema for normalized behavioral state"""
     state_id: str
@@ -35,48 +49,173 @@ class NormalizeStateBatchRequest(BaseModel):
     """Request model for batch state normalization"""
     states: List[NormalizeStateRequest]
 
+# Compiled once at import; the batch endpoint validates each state with this
+# generated function instead of building a validated Pydantic model per state
+validate_state_request = fastjsonschema.compile(NormalizeStateRequest.model_json_schema())
+
+def coerce_raw_value(state: Any) -> Any:
+    """Convert a numeric-string or boolean raw_value to float, as Pydantic's lax mode does for /normalize_state"""
+    if isinstance(state, dict) and isinstance(state.get("raw_value"), (str, bool)):
+        try:
+            return {**state, "raw_value": float(state["raw_value"])}
+        except ValueError:
+            # Left as-is for the schema validator to reject
+            pass
+    return state
+
+def is_json_content_type(content_type: Optional[str]) -> bool:
+    """Check a Content-Type header the way FastAPI does before parsing a JSON body"""
+    if not content_type:
+        return True
+    message = Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+def parse_batch_request(payload: Any) -> List[NormalizeStateRequest]:
+    """
+    Validate a parsed batch normalization request body.
+    
+    Args:
+        payload: Parsed JSON body of the form {"states": [...]}
+        
+    Returns:
+        List[NormalizeStateRequest]: Validated state requests
+        
+    Raises:
+        RequestValidationError: If the body or any state fails validation
+    """
+    if not isinstance(payload, dict) or "states" not in payload:
+        raise RequestValidationError([
+            {"loc": ("body", "states"), "msg": "Field required", "type": "missing"}
+        ])
+    if not isinstance(payload["states"], list):
+        raise RequestValidationError([
+            {"loc": ("body", "states"), "msg": "Input should be a valid list", "type": "list_type"}
+        ])
+    
+    states = []
+    for index, state in enumerate(payload["states"]):
+        try:
+            state = validate_state_request(coerce_raw_value(state))
+        except fastjsonschema.JsonSchemaValueException as e:
+            # e.path starts with the validator's root name ("data")
+            raise RequestValidationError([{
+                "loc": ("body", "states", index, *e.path[1:]),
+                "msg": e.message,
+                "type": e.rule or "value_error"
+            }]) from e
+        states.append(NormalizeStateRequest.model_construct(**{**state, "raw_value": float(state["raw_value"])}))
+    return states
+
+CONTEXT_WEIGHTS_FILE = "context_weights.json"
+
+DEFAULT_CONTEXT_WEIGHTS = {
+    "default_behavior_weights": {
+        "finance": 1.0,
+        "game": 1.2,
+        "gurukul": 1.3,
+        "insight": 1.1
+    }
+}
+
+# Parsed context weights keyed by the file mtime they were read at. The file is
+# rewritten at runtime by the Agami predictor, so the cache is revalidated
+# against the current mtime instead of being loaded only once.
+_context_weights_cache: Dict[str, Any] = {"mtime": None, "weights": None}
+
 def load_context_weights() -> Dict[str, Any]:
-    """Load context weights from file"""
+    """Load context weights from file, reusing the parsed copy while the file is unchanged"""
     try:
-        with open("context_weights.json", "r") as f:
-            return json.load(f)
+        mtime = os.path.getmtime(CONTEXT_WEIGHTS_FILE)
+        if _context_weights_cache["mtime"] != mtime:
+            with open(CONTEXT_WEIGHTS_FILE, "rb") as f:
+                _context_weights_cache["weights"] = orjson.loads(f.read())
+            _context_weights_cache["mtime"] = mtime
+        return _context_weights_cache["weights"]
     except Exception as e:
         # Return default weights if file cannot be loaded
-        return {
-            "default_behavior_weights": {
-                "finance": 1.0,
-                "game": 1.2,
-                "gurukul": 1.3,
-                "insight": 1.1
-            }
-        }
+        return DEFAULT_CONTEXT_WEIGHTS
 
-def normalize_single_state(request: NormalizeStateRequest) -> StateSchema:
-    """Normalize a single state"""
-    # Generate unique state ID
-    state_id = str(uuid.uuid4())
-    
-    # Load context weights
-    weights = load_context_weights()
-    behavior_weights = weights.get("default_behavior_weights", {})
-    
+# Ledger source tag for each known module, built once instead of per record
+SOURCE_BY_MODULE = {
+    module: f"normalization_api_{module}"
+    for module in ("finance", "game", "gurukul", "insight")
+}
+
+def get_behavior_weights() -> Dict[str, Any]:
+    """Get the per-module behavior weights from the context weights"""
+    return load_context_weights().get("default_behavior_weights", {})
+
+def build_state_fields(
+    request: NormalizeStateRequest,
+    module_weight: float,
+    normalized_value: float,
+    state_id: Optional[str] = None,
+    timestamp: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the fields of a normalized state from precomputed weight and value"""
+    return {
+        "state_id": state_id or str(uuid.uuid4()),
+        "module": request.module,
+        "action_type": request.action_type,
+        "weight": module_weight,
+        "feedback_value": normalized_value,
+        "timestamp": timestamp or datetime.utcnow().isoformat()
+    }
+
+def generate_state_ids(count: int) -> List[str]:
+    """Generate random (version 4) state IDs from a single urandom read"""
+    random_bytes = os.urandom(16 * count)
+    return [
+        str(uuid.UUID(bytes=random_bytes[i:i + 16], version=4))
+        for i in range(0, 16 * count, 16)
+    ]
+
+def normalize_state_fields(request: NormalizeStateRequest) -> Dict[str, Any]:
+    """Normalize a single state into its StateSchema fields"""
     # Apply module-specific weighting
-    module_weight = behavior_weights.get(request.module, 1.0)
+    module_weight = float(get_behavior_weights().get(request.module, 1.0))
     
     # Apply scaling (in a real implementation, this could be more complex)
     normalized_value = request.raw_value * module_weight
     
-    # Create normalized state
-    normalized_state = StateSchema(
-        state_id=state_id,
-        module=request.module,
-        action_type=request.action_type,
-        weight=module_weight,
-        feedback_value=normalized_value,
-        timestamp=datetime.utcnow().isoformat()
-    )
-    
-    return normalized_state
+    return build_state_fields(request, module_weight, normalized_value)
+
+def normalize_single_state(request: NormalizeStateRequest) -> StateSchema:
+    """Normalize a single state"""
+    # Every field is built with the right type, so skip re-validating it
+    return StateSchema.model_construct(**normalize_state_fields(request))
+
+def build_event_record(
+    request: NormalizeStateRequest,
+    state: Dict[str, Any],
+    created_at: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Build the Karma Ledger record for a normalized state's fields and its originating request"""
+    module = state["module"]
+    # Store the state's moment as a BSON datetime, like the rest of the ledger,
+    # so range queries and sorts on timestamp include normalized states
+    created_at = created_at or datetime.fromisoformat(state["timestamp"])
+    return {
+        "event_id": state["state_id"],
+        "event_type": "normalized_state",
+        "data": {
+            "module": module,
+            "action_type": state["action_type"],
+            "raw_value": request.raw_value,
+            "normalized_value": state["feedback_value"],
+            "weight": state["weight"],
+            "context": request.context,
+            "metadata": request.metadata
+        },
+        "timestamp": created_at,
+        "source": SOURCE_BY_MODULE.get(module) or f"normalization_api_{module}",
+        "status": "processed",
+        "created_at": created_at
+    }
 
 @router.post("/normalize_state", response_model=StateSchema)
 async def normalize_state(request: NormalizeStateRequest, _: bool = Depends(validation_dependency)):
@@ -90,85 +229,110 @@ async def normalize_state(request: NormalizeStateRequest, _: bool = Depends(vali
         StateSchema: Normalized state
     """
     try:
-        # Normalize the state
-        normalized_state = normalize_single_state(request)
+        # Normalize the state; the same fields feed the ledger record and the
+        # response model
+        state_fields = normalize_state_fields(request)
         
         # Log to Karma Ledger (karma_events collection)
-        event_record = {
-            "event_id": normalized_state.state_id,
-            "event_type": "normalized_state",
-            "data": {
-                "module": normalized_state.module,
-                "action_type": normalized_state.action_type,
-                "raw_value": request.raw_value,
-                "normalized_value": normalized_state.feedback_value,
-                "weight": normalized_state.weight,
-                "context": request.context,
-                "metadata": request.metadata
-            },
-            "timestamp": normalized_state.timestamp,
-            "source": f"normalization_api_{normalized_state.module}",
-            "status": "processed",
-            "created_at": datetime.utcnow()
-        }
+        event_record = build_event_record(request, state_fields)
         
-        # Insert into database
-        karma_events_col.insert_one(event_record)
+        # Queue for a bulk insert into the database
+        await karma_events_buffer.add(event_record)
         
-        return normalized_state
+        return StateSchema.model_construct(**state_fields)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error normalizing state: {str(e)}")
 
-@router.post("/normalize_state/batch", response_model=List[StateSchema])
-async def normalize_state_batch(request: NormalizeStateBatchRequest, _: bool = Depends(validation_dependency)):
+# The nested NormalizeStateRequest is already in components/schemas (the
+# single-state route registers it), so its $defs copy is left out
+BATCH_REQUEST_SCHEMA = {
+    key: value
+    for key, value in NormalizeStateBatchRequest.model_json_schema(
+        ref_template="#/components/schemas/{model}"
+    ).items()
+    if key != "$defs"
+}
+
+@router.post(
+    "/normalize_state/batch",
+    response_model=None,
+    responses={200: {"model": List[StateSchema]}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": BATCH_REQUEST_SCHEMA
+                }
+            }
+        }
+    }
+)
+async def normalize_state_batch(raw_request: Request, _: bool = Depends(validation_dependency)):
     """
     Normalize multiple behavioral states from any modules into unified karmic signals.
     
     Args:
-        request (NormalizeStateBatchRequest): Batch state normalization request
+        raw_request (Request): Request whose body is a NormalizeStateBatchRequest
         
     Returns:
         List[StateSchema]: List of normalized states
     """
+    if not is_json_content_type(raw_request.headers.get("content-type")):
+        raise RequestValidationError([
+            {"loc": ("body",), "msg": "Content-Type must be application/json", "type": "content_type"}
+        ])
+    # validation_dependency has already parsed the body; Starlette caches
+    # that result on the request, so this does not parse it a second time
+    try:
+        payload = await raw_request.json()
+    except ValueError as e:
+        raise RequestValidationError([
+            {"loc": ("body",), "msg": "JSON decode error", "type": "json_invalid"}
+        ]) from e
+    states = parse_batch_request(payload)
+    
     try:
         normalized_states = []
+        records = []
         
-        # Normalize each state
-        for state_request in request.states:
-            normalized_state = normalize_single_state(state_request)
-            normalized_states.append(normalized_state)
+        # Look up behavior weights once for the whole batch
+        behavior_weights = get_behavior_weights()
         
-        # Log all to Karma Ledger (karma_events collection)
-        for normalized_state in normalized_states:
-            # Find the corresponding request
-            original_request = next(
-                (req for req in request.states if req.action_type == normalized_state.action_type), 
-                None
-            )
+        # The whole batch shares one timestamp and draws its IDs from one
+        # urandom read
+        created_at = datetime.utcnow()
+        timestamp = created_at.isoformat()
+        state_ids = generate_state_ids(len(states))
+        
+        # Build each state and its ledger record in a single pass so every
+        # record is bound to the request that produced it. States stay plain
+        # dicts: the same dict feeds the ledger record and the response, so no
+        # StateSchema instance or model_dump copy is allocated per state.
+        for state_request, state_id in zip(states, state_ids):
+            module_weight = float(behavior_weights.get(state_request.module, 1.0))
+            normalized_value = state_request.raw_value * module_weight
             
-            event_record = {
-                "event_id": normalized_state.state_id,
-                "event_type": "normalized_state",
-                "data": {
-                    "module": normalized_state.module,
-                    "action_type": normalized_state.action_type,
-                    "raw_value": original_request.raw_value if original_request else None,
-                    "normalized_value": normalized_state.feedback_value,
-                    "weight": normalized_state.weight,
-                    "context": original_request.context if original_request else None,
-                    "metadata": original_request.metadata if original_request else None
-                },
-                "timestamp": normalized_state.timestamp,
-                "source": f"normalization_api_{normalized_state.module}",
-                "status": "processed",
-                "created_at": datetime.utcnow()
-            }
+            normalized_state = build_state_fields(
+                state_request, module_weight, normalized_value, state_id, timestamp
+            )
+            normalized_states.append(normalized_state)
             
-            # Insert into database
-            karma_events_col.insert_one(event_record)
+            records.append(build_event_record(state_request, normalized_state, created_at))
+        
+        # Log all to Karma Ledger (karma_events collection) in a single bulk write
+        if records:
+            try:
+                await run_in_threadpool(karma_events_col.insert_many, records, ordered=False)
+            except BulkWriteError as e:
+                raise HTTPException(status_code=500, detail=f"Error logging batch states: {str(e)}")
         
-        return normalized_states
+        # The states were built by this endpoint, so serialize them directly
+        # instead of having FastAPI validate each one against response_model
+        return Response(content=orjson.dumps(normalized_states), media_type="application/json")
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error normalizing batch states: {str(e)}")
\ No newline at end of file
@@ -20,13 +20,6 @@ class SignalPayload(BaseModel):
     signal: Dict[str, Any]
     timestamp: str
 
-class HealthCheckPayload(BaseModel):
-    """Health check payload model"""
-    transmission_id: str
-    source: str
-    type: str
-    timestamp: str
-
 RECEIVED_SIGNALS = []
 
 @app.post("/api/v1/insightflow/receive")
@@ -56,22 +49,18 @@ async def receive_karmic_signal(payload: SignalPayload):
         "timestamp": datetime.now().isoformat()
     }
 
-@app.post("/api/v1/insightflow/health")
-async def health_check(payload: HealthCheckPayload):
+@app.get("/api/v1/insightflow/health")
+async def health_check():
     """
     Health check endpoint
     
-    Args:
-        payload: Health check payload
-        
     Returns:
         Dict with health status
     """
-    print(f"[{datetime.now().isoformat()}] Health check from {payload.source}")
+    print(f"[{datetime.now().isoformat()}] Health check")
     
     return {
         "status": "healthy",
-        "transmission_id": payload.transmission_id,
         "message": "InsightFlow stub is healthy",
         "timestamp": datetime.now().isoformat()
     }
@@ -117,7 +106,7 @@ if __name__ == "__main__":
     print("Starting InsightFlow Stub Server...")
     print("Endpoints available:")
     print("  POST /api/v1/insightflow/receive - Receive karmic signals")
-    print("  POST /api/v1/insightflow/health - Health check")
+    print("  GET /api/v1/insightflow/health - Health check")
     print("  GET /api/v1/insightflow/signals - Get received signals")
     print("  DELETE /api/v1/insightflow/signals - Clear received signals")
     print("  GET /health - Health check")
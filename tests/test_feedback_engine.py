@@ -116,6 +116,59 @@ def test_stp_bridge_forward_signal():
     
     print("✓ STP bridge signal forwarding test passed")
 
+def test_stp_bridge_batch_forward_preserves_order():
+    """Test concurrent batch forwarding returns results in signal order"""
+    bridge = STPBridge({"enabled": False, "max_concurrency": 4})
+    bridge.forward_signal = lambda signal: {"status": "skipped", "signal_id": signal["signal_id"]}
+    
+    signals = [{"signal_id": str(uuid.uuid4())} for _ in range(10)]
+    results = bridge.batch_forward_signals(signals)
+    
+    assert [r["signal_id"] for r in results] == [s["signal_id"] for s in signals]
+    assert bridge.batch_forward_signals([]) == []
+    
+    print("✓ STP bridge batch forwarding test passed")
+
+def test_stp_bridge_backoff_delay():
+    """Test retry backoff stays within the jittered exponential bounds"""
+    bridge = STPBridge({"enabled": False, "retry_backoff_base": 0.1, "retry_backoff_cap": 1.0})
+    
+    for attempt in range(6):
+        delay = bridge._backoff_delay(attempt)
+        assert 0 <= delay <= min(1.0, 0.1 * (2 ** attempt))
+    
+    # Retry-After takes precedence but is still capped
+    assert bridge._backoff_delay(0, retry_after=0.5) == 0.5
+    assert bridge._backoff_delay(0, retry_after=30) == 1.0
+    
+    print("✓ STP bridge backoff test passed")
+
+def test_stp_bridge_bulk_forward_chunks():
+    """Test bulk forwarding sends one request per chunk to the bulk endpoint"""
+    bridge = STPBridge({"bulk_enabled": True, "bulk_chunk_size": 3})
+    sent = []
+    bridge._send_with_retry = lambda payload, endpoint=None: sent.append((endpoint, payload)) or {"status_code": 200}
+    
+    signals = [{"signal_id": str(uuid.uuid4())} for _ in range(7)]
+    results = bridge.batch_forward_signals(signals)
+    
+    assert [len(payload["signals"]) for _, payload in sent] == [3, 3, 1]
+    assert all(endpoint == bridge.insightflow_bulk_endpoint for endpoint, _ in sent)
+    assert [r["signal_id"] for r in results] == [s["signal_id"] for s in signals]
+    assert all(r["status"] == "success" for r in results)
+    
+    print("✓ STP bridge bulk forwarding test passed")
+
+def test_stp_bridge_health_endpoint():
+    """Test the health endpoint defaults to a sibling of the receive endpoint"""
+    bridge = STPBridge({"insightflow_endpoint": "http://insightflow:8001/api/v1/insightflow/receive"})
+    assert bridge.health_endpoint == "http://insightflow:8001/api/v1/insightflow/health"
+    
+    bridge = STPBridge({"health_endpoint": "http://insightflow:8001/health"})
+    assert bridge.health_endpoint == "http://insightflow:8001/health"
+    
+    print("✓ STP bridge health endpoint test passed")
+
 def test_convenience_functions():
     """Test convenience functions"""
     # Test compute_user_influence
@@ -135,6 +188,10 @@ if __name__ == "__main__":
     test_calculate_behavioral_bias()
     test_aggregate_per_user_and_module()
     test_stp_bridge_forward_signal()
+    test_stp_bridge_batch_forward_preserves_order()
+    test_stp_bridge_backoff_delay()
+    test_stp_bridge_bulk_forward_chunks()
+    test_stp_bridge_health_endpoint()
     test_convenience_functions()
     
     print("\n🎉 All feedback engine tests passed!")
\ No newline at end of file
@@ -5,12 +5,16 @@ import sys
 import os
 import uuid
 from datetime import datetime
+import pytest
+from fastapi.exceptions import RequestValidationError
 
 # Add the project root to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from routes.normalization import normalize_single_state, StateSchema
-from routes.normalization import NormalizeStateRequest
+from routes.normalization import NormalizeStateRequest, build_event_record, normalize_state_fields
+from routes.normalization import generate_state_ids
+from routes.normalization import parse_batch_request, is_json_content_type
 
 def test_normalize_single_state_finance():
     """Test normalizing a finance module state"""
@@ -107,6 +111,95 @@ def test_normalize_single_state_invalid_module():
     assert isinstance(uuid.UUID(normalized.state_id), uuid.UUID)
     assert isinstance(normalized.timestamp, str)
 
+def test_build_event_record_binds_originating_request():
+    """Test that records for states sharing an action_type keep their own raw values"""
+    requests = [
+        NormalizeStateRequest(module="finance", action_type="transaction", raw_value=10.0, context={"n": 1}),
+        NormalizeStateRequest(module="game", action_type="transaction", raw_value=20.0, context={"n": 2})
+    ]
+    
+    records = [build_event_record(req, normalize_state_fields(req)) for req in requests]
+    
+    assert [r["data"]["raw_value"] for r in records] == [10.0, 20.0]
+    assert [r["data"]["context"] for r in records] == [{"n": 1}, {"n": 2}]
+    assert records[1]["data"]["normalized_value"] == 20.0 * records[1]["data"]["weight"]
+    assert records[1]["source"] == "normalization_api_game"
+    assert records[0]["event_type"] == "normalized_state"
+    assert isinstance(records[0]["timestamp"], datetime)
+    assert records[0]["timestamp"] == records[0]["created_at"]
+
+def test_generate_state_ids():
+    """Test that bulk-generated state IDs are unique version 4 UUIDs"""
+    state_ids = generate_state_ids(50)
+    
+    assert len(state_ids) == 50
+    assert len(set(state_ids)) == 50
+    assert all(uuid.UUID(state_id).version == 4 for state_id in state_ids)
+    assert generate_state_ids(0) == []
+
+def test_parse_batch_request():
+    """Test that a batch body is validated into state requests"""
+    payload = {"states": [{"module": "game", "action_type": "level_completed", "raw_value": 75}]}
+    
+    states = parse_batch_request(payload)
+    
+    assert len(states) == 1
+    assert states[0].module == "game"
+    assert states[0].raw_value == 75.0
+    assert isinstance(states[0].raw_value, float)
+    assert states[0].context is None
+    assert states[0].metadata is None
+
+def test_parse_batch_request_coerces_numeric_strings():
+    """Test that the batch endpoint accepts numeric-string raw values like /normalize_state does"""
+    payload = {"states": [{"module": "game", "action_type": "level_completed", "raw_value": "75"}]}
+    
+    states = parse_batch_request(payload)
+    single = NormalizeStateRequest(module="game", action_type="level_completed", raw_value="75")
+    
+    assert states[0].raw_value == single.raw_value == 75.0
+    assert isinstance(states[0].raw_value, float)
+
+def test_parse_batch_request_coerces_booleans():
+    """Test that the batch endpoint accepts boolean raw values like /normalize_state does"""
+    payload = {"states": [{"module": "game", "action_type": "level_completed", "raw_value": True},
+                          {"module": "game", "action_type": "level_completed", "raw_value": False}]}
+    
+    states = parse_batch_request(payload)
+    single = NormalizeStateRequest(module="game", action_type="level_completed", raw_value=True)
+    
+    assert states[0].raw_value == single.raw_value == 1.0
+    assert states[1].raw_value == 0.0
+    assert all(isinstance(state.raw_value, float) for state in states)
+
+def test_is_json_content_type():
+    """Test that only JSON content types (or none) are parsed as a batch body"""
+    assert is_json_content_type(None)
+    assert is_json_content_type("application/json")
+    assert is_json_content_type("application/json; charset=utf-8")
+    assert is_json_content_type("application/vnd.karma+json")
+    assert not is_json_content_type("text/plain")
+    assert not is_json_content_type("application/x-www-form-urlencoded")
+
+def test_parse_batch_request_invalid():
+    """Test that malformed batch bodies raise request validation errors"""
+    invalid_payloads = [
+        ([], ("body", "states")),
+        ({"items": []}, ("body", "states")),
+        ({"states": {}}, ("body", "states")),
+        ({"states": [{"module": "game", "action_type": "level_completed"}]}, ("body", "states", 0)),
+        ({"states": [{"module": "game", "action_type": "x", "raw_value": 1},
+                     {"module": "game", "action_type": "x", "raw_value": "high"}]}, ("body", "states", 1, "raw_value"))
+    ]
+    
+    for payload, loc in invalid_payloads:
+        with pytest.raises(RequestValidationError) as exc_info:
+            parse_batch_request(payload)
+        errors = exc_info.value.errors()
+        assert len(errors) == 1
+        assert tuple(errors[0]["loc"]) == loc
+        assert errors[0]["msg"]
+
 if __name__ == "__main__":
     print("Running Behavioral State Normalization Tests...")
     
@@ -125,4 +218,17 @@ if __name__ == "__main__":
     test_normalize_single_state_invalid_module()
     print("✓ Invalid module normalization test passed")
     
+    test_build_event_record_binds_originating_request()
+    print("✓ Event record binding test passed")
+    
+    test_generate_state_ids()
+    print("✓ State ID generation test passed")
+    
+    test_parse_batch_request()
+    test_parse_batch_request_coerces_numeric_strings()
+    test_parse_batch_request_coerces_booleans()
+    test_is_json_content_type()
+    test_parse_batch_request_invalid()
+    print("✓ Batch request parsing tests passed")
+    
     print("\n🎉 All normalization tests passed!")
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Test suite for the MongoDB Write Buffer
+"""
+import sys
+import os
+import asyncio
+import logging
+import time
+from pymongo.errors import BulkWriteError
+
+# Add the project root to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.write_buffer import WriteBuffer
+
+class FakeCollection:
+    """Collection stand-in that records insert_many calls"""
+    name = "fake"
+
+    def __init__(self):
+        self.batches = []
+
+    def insert_many(self, records, ordered=True):
+        self.batches.append(list(records))
+
+class FailingCollection(FakeCollection):
+    """Collection stand-in whose inserts fail a set number of times"""
+
+    def __init__(self, failures, error=None):
+        super().__init__()
+        self.failures = failures
+        self.error = error or ConnectionError("connection refused")
+
+    def insert_many(self, records, ordered=True):
+        if self.failures > 0:
+            self.failures -= 1
+            raise self.error
+        super().insert_many(records, ordered)
+
+class SlowCollection(FakeCollection):
+    """Collection stand-in whose inserts take a while"""
+
+    def insert_many(self, records, ordered=True):
+        time.sleep(0.1)
+        super().insert_many(records, ordered)
+
+def test_flushes_when_full():
+    """Test that reaching max_size triggers a bulk insert"""
+    collection = FakeCollection()
+    buffer = WriteBuffer(collection, max_size=3, max_ms=10000)
+
+    async def run():
+        for i in range(3):
+            await buffer.add({"n": i})
+        # add() only wakes the flusher; the insert happens in the background
+        assert collection.batches == []
+        await asyncio.sleep(0.05)
+        assert collection.batches == [[{"n": 0}, {"n": 1}, {"n": 2}]]
+        await buffer.close()
+
+    asyncio.run(run())
+
+    assert collection.batches == [[{"n": 0}, {"n": 1}, {"n": 2}]]
+
+def test_flushes_after_max_ms():
+    """Test that buffered records are written once max_ms elapses"""
+    collection = FakeCollection()
+    buffer = WriteBuffer(collection, max_size=100, max_ms=10)
+
+    async def run():
+        await buffer.add({"n": 0})
+        await buffer.add({"n": 1})
+        assert collection.batches == []
+        await asyncio.sleep(0.1)
+        assert collection.batches == [[{"n": 0}, {"n": 1}]]
+        await buffer.close()
+
+    asyncio.run(run())
+
+def test_close_flushes_remaining_records():
+    """Test that close writes out records still in the buffer"""
+    collection = FakeCollection()
+    buffer = WriteBuffer(collection, max_size=2, max_ms=10000)
+
+    async def run():
+        for i in range(5):
+            await buffer.add({"n": i})
+        await buffer.close()
+
+    asyncio.run(run())
+
+    assert [len(batch) for batch in collection.batches] == [2, 2, 1]
+    assert buffer.records == []
+
+def test_records_survive_failed_flush():
+    """Test that records are kept in the buffer when an insert fails"""
+    collection = FailingCollection(failures=1)
+    buffer = WriteBuffer(collection, max_size=10, max_ms=10000)
+
+    async def run():
+        await buffer.add({"n": 0})
+        await buffer.add({"n": 1})
+        try:
+            await buffer.flush_now()
+            assert False, "flush should have failed"
+        except ConnectionError:
+            pass
+        assert buffer.records == [{"n": 0}, {"n": 1}]
+        await buffer.close()
+
+    asyncio.run(run())
+
+    assert collection.batches == [[{"n": 0}, {"n": 1}]]
+    assert buffer.dropped == 0
+
+def test_partial_bulk_failure_requeues_unwritten_records():
+    """Test that only records reported as failed (and not duplicates) are retried"""
+    error = BulkWriteError({
+        "writeErrors": [
+            {"index": 1, "code": 121, "errmsg": "write failed"},
+            {"index": 2, "code": 11000, "errmsg": "duplicate key"}
+        ]
+    })
+    collection = FailingCollection(failures=1, error=error)
+    buffer = WriteBuffer(collection, max_size=10, max_ms=10000)
+
+    async def run():
+        for i in range(3):
+            await buffer.add({"n": i})
+        try:
+            await buffer.flush_now()
+        except BulkWriteError:
+            pass
+        assert buffer.records == [{"n": 1}]
+        await buffer.close()
+
+    asyncio.run(run())
+
+    assert collection.batches == [[{"n": 1}]]
+
+def test_drops_records_after_max_retries():
+    """Test that repeatedly failing records are dropped and counted"""
+    collection = FailingCollection(failures=100)
+    buffer = WriteBuffer(collection, max_size=10, max_ms=10000, max_retries=2)
+
+    async def run():
+        await buffer.add({"n": 0})
+        for _ in range(3):
+            try:
+                await buffer.flush_now()
+            except ConnectionError:
+                pass
+        if buffer.task:
+            buffer.task.cancel()
+
+    asyncio.run(run())
+
+    assert buffer.records == []
+    assert buffer.dropped == 1
+
+def test_works_across_event_loops():
+    """Test that a buffer outliving one event loop keeps flushing on the next"""
+    collection = FakeCollection()
+    buffer = WriteBuffer(collection, max_size=100, max_ms=10)
+
+    async def first():
+        # The loop ends before the flusher gets a chance to run
+        await buffer.add({"n": 0})
+
+    async def second():
+        await buffer.add({"n": 1})
+        await asyncio.sleep(0.1)
+        assert buffer.records == []
+        await buffer.close()
+
+    asyncio.run(first())
+    asyncio.run(second())
+
+    assert collection.batches == [[{"n": 0}, {"n": 1}]]
+
+def test_close_waits_for_in_flight_insert():
+    """Test that close lets a running insert finish rather than cancelling it"""
+    collection = SlowCollection()
+    buffer = WriteBuffer(collection, max_size=2, max_ms=10000)
+
+    async def run():
+        await buffer.add({"n": 0})
+        await buffer.add({"n": 1})
+        # Let the flusher start its insert, then close during it
+        await asyncio.sleep(0.02)
+        assert buffer.records == []
+        await buffer.close()
+
+    asyncio.run(run())
+
+    assert collection.batches == [[{"n": 0}, {"n": 1}]]
+
+def test_close_logs_unwritten_records(caplog):
+    """Test that a failed flush on close is logged with the unwritten count"""
+    collection = FailingCollection(failures=100)
+    buffer = WriteBuffer(collection, max_size=10, max_ms=10000)
+
+    async def run():
+        await buffer.add({"n": 0})
+        await buffer.add({"n": 1})
+        await buffer.close()
+
+    with caplog.at_level(logging.ERROR, logger="utils.write_buffer"):
+        asyncio.run(run())
+
+    assert buffer.records == [{"n": 0}, {"n": 1}]
+    assert "2 documents left unwritten" in caplog.text
+
+if __name__ == "__main__":
+    print("Running Write Buffer Tests...")
+
+    test_flushes_when_full()
+    print("✓ Size-triggered flush test passed")
+
+    test_flushes_after_max_ms()
+    print("✓ Time-triggered flush test passed")
+
+    test_close_flushes_remaining_records()
+    print("✓ Flush on close test passed")
+
+    test_records_survive_failed_flush()
+    print("✓ Failed flush retention test passed")
+
+    test_partial_bulk_failure_requeues_unwritten_records()
+    print("✓ Partial bulk failure test passed")
+
+    test_drops_records_after_max_retries()
+    print("✓ Retry limit test passed")
+
+    test_works_across_event_loops()
+    print("✓ Event loop rebinding test passed")
+
+    test_close_waits_for_in_flight_insert()
+    print("✓ In-flight insert on close test passed")
+
+    print("\n🎉 All write buffer tests passed!")
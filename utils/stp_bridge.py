@@ -5,15 +5,25 @@ Configurable bridge to forward karmic feedback signals to InsightFlow.
 """
 import json
 import logging
+import random
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any, Optional, List
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from fastapi import HTTPException
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Status codes worth retrying; any other non-success status fails fast
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 class STPBridge:
     """STP (Signal Transmission Protocol) Bridge for forwarding signals to InsightFlow"""
     
@@ -26,7 +36,31 @@ class STPBridge:
         )
         self.retry_attempts = self.config.get("retry_attempts", 3)
         self.timeout = self.config.get("timeout", 10)
+        self.retry_backoff_base = self.config.get("retry_backoff_base", 0.1)
+        self.retry_backoff_cap = self.config.get("retry_backoff_cap", 5.0)
         self.enabled = self.config.get("enabled", True)
+        self.bulk_enabled = self.config.get("bulk_enabled", False)
+        self.insightflow_bulk_endpoint = self.config.get(
+            "insightflow_bulk_endpoint",
+            self.insightflow_endpoint.rstrip("/") + "/bulk"
+        )
+        self.bulk_chunk_size = self.config.get("bulk_chunk_size", 500)
+        self.health_endpoint = self.config.get(
+            "health_endpoint",
+            self.insightflow_endpoint.rstrip("/").rsplit("/", 1)[0] + "/health"
+        )
+        self.max_concurrency = self.config.get("max_concurrency", 32)
+        
+        # Reuse pooled keep-alive connections across forwards instead of
+        # opening a new TCP/TLS connection per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config.get("pool_connections", 32),
+            pool_maxsize=self.config.get("pool_maxsize", 64),
+            max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
     def forward_signal(self, signal: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -81,29 +115,39 @@ class STPBridge:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
-    def _send_with_retry(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def _send_with_retry(self, payload: Dict[str, Any], endpoint: Optional[str] = None) -> Dict[str, Any]:
         """
         Send payload with retry logic
         
+        Retries network errors and retryable statuses with capped exponential
+        backoff and full jitter, honouring Retry-After on 429/503 responses.
+        
         Args:
             payload: Payload to send
+            endpoint: Endpoint to post to (defaults to the InsightFlow receive endpoint)
             
         Returns:
             Dict with response details
         """
+        endpoint = endpoint or self.insightflow_endpoint
         last_exception = Exception("Unknown error")
         
+        # Encode once up front rather than on every attempt
+        body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        
         for attempt in range(self.retry_attempts):
+            retry_after = None
+            
             try:
-                response = requests.post(
-                    self.insightflow_endpoint,
-                    json=payload,
+                response = self.session.post(
+                    endpoint,
+                    data=body,
+                    headers=JSON_HEADERS,
                     timeout=self.timeout
                 )
                 
-                response_data = response.json() if response.content else {}
-                
                 if response.status_code in [200, 201]:
+                    response_data = response.json() if response.content else {}
                     return {
                         "status_code": response.status_code,
                         "response": response_data,
@@ -118,31 +162,126 @@ class STPBridge:
                         detail=f"InsightFlow returned status {response.status_code}"
                     )
                     
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        break
+                    if response.status_code in [429, 503]:
+                        retry_after = self._parse_retry_after(response)
+                    
             except Exception as e:
                 logger.warning(f"Attempt {attempt + 1} failed with exception: {str(e)}")
                 last_exception = e
+            
+            if attempt < self.retry_attempts - 1:
+                time.sleep(self._backoff_delay(attempt, retry_after))
         
         # If we get here, all attempts failed
         raise last_exception
     
-    def batch_forward_signals(self, signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt: Retry-After if given, else full-jitter exponential backoff"""
+        if retry_after is not None:
+            return min(self.retry_backoff_cap, retry_after)
+        delay = min(self.retry_backoff_cap, self.retry_backoff_base * (2 ** attempt))
+        return random.uniform(0, delay)
+    
+    @staticmethod
+    def _parse_retry_after(response: requests.Response) -> Optional[float]:
+        """Parse a Retry-After header given in seconds"""
+        try:
+            return max(0.0, float(response.headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return None
+    
+    def forward_signals_bulk(self, signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Forward multiple signals in batch
+        Forward multiple signals to the InsightFlow bulk endpoint
+        
+        Signals are sent in chunks of ``bulk_chunk_size``, one request per chunk.
         
         Args:
             signals: List of signals to forward
             
         Returns:
-            List of forwarding results
+            List of forwarding results, one per signal
         """
+        if not self.enabled:
+            return [
+                {
+                    "status": "skipped",
+                    "message": "STP bridge is disabled",
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                for _ in signals
+            ]
+        
         results = []
         
-        for signal in signals:
-            result = self.forward_signal(signal)
-            results.append(result)
+        for start in range(0, len(signals), self.bulk_chunk_size):
+            chunk = signals[start:start + self.bulk_chunk_size]
+            signal_ids = [signal.get("signal_id", str(uuid.uuid4())) for signal in chunk]
             
+            try:
+                payload = {
+                    "transmission_id": str(uuid.uuid4()),
+                    "source": "karmachain_feedback_engine",
+                    "signals": chunk,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                
+                response = self._send_with_retry(payload, self.insightflow_bulk_endpoint)
+                
+                logger.info(f"{len(chunk)} signals forwarded to InsightFlow in bulk successfully")
+                
+                timestamp = datetime.utcnow().isoformat()
+                results.extend(
+                    {
+                        "status": "success",
+                        "signal_id": signal_id,
+                        "transmission_id": payload["transmission_id"],
+                        "response": response,
+                        "timestamp": timestamp
+                    }
+                    for signal_id in signal_ids
+                )
+                
+            except Exception as e:
+                logger.error(f"Error forwarding {len(chunk)} signals to InsightFlow in bulk: {str(e)}")
+                
+                timestamp = datetime.utcnow().isoformat()
+                results.extend(
+                    {
+                        "status": "error",
+                        "signal_id": signal_id,
+                        "error": str(e),
+                        "timestamp": timestamp
+                    }
+                    for signal_id in signal_ids
+                )
+        
         return results
     
+    def batch_forward_signals(self, signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Forward multiple signals in batch
+        
+        Args:
+            signals: List of signals to forward
+            
+        Returns:
+            List of forwarding results
+        """
+        if self.bulk_enabled:
+            return self.forward_signals_bulk(signals)
+        
+        if len(signals) <= 1 or self.max_concurrency <= 1:
+            return [self.forward_signal(signal) for signal in signals]
+        
+        # Dispatch signals concurrently over the shared connection pool so the
+        # batch takes roughly one round-trip instead of one per signal
+        max_workers = min(self.max_concurrency, len(signals))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.forward_signal, signals))
+    
     def health_check(self) -> Dict[str, Any]:
         """
         Check the health of the STP bridge connection
@@ -151,23 +290,15 @@ class STPBridge:
             Dict with health status
         """
         try:
-            # Send a simple health check ping
-            health_payload = {
-                "transmission_id": str(uuid.uuid4()),
-                "source": "karmachain_feedback_engine",
-                "type": "health_check",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            response = requests.post(
-                self.insightflow_endpoint,
-                json=health_payload,
+            # Probe the health endpoint without sending a payload
+            response = self.session.get(
+                self.health_endpoint,
                 timeout=self.timeout
             )
             
             return {
                 "status": "healthy" if response.status_code in [200, 201] else "unhealthy",
-                "endpoint": self.insightflow_endpoint,
+                "endpoint": self.health_endpoint,
                 "status_code": response.status_code,
                 "response_time": response.elapsed.total_seconds(),
                 "timestamp": datetime.utcnow().isoformat()
@@ -176,11 +307,15 @@ class STPBridge:
         except Exception as e:
             return {
                 "status": "unhealthy",
-                "endpoint": self.insightflow_endpoint,
+                "endpoint": self.health_endpoint,
                 "error": str(e),
                 "timestamp": datetime.utcnow().isoformat()
             }
 
+    def close(self):
+        """Close pooled HTTP connections held by the bridge"""
+        self.session.close()
+
 # Global instance
 stp_bridge = STPBridge()
 
@@ -195,4 +330,8 @@ def batch_forward_karmic_signals(signals: List[Dict[str, Any]]) -> List[Dict[str
 
 def check_stp_bridge_health() -> Dict[str, Any]:
     """Check the health of the STP bridge"""
-    return stp_bridge.health_check()
\ No newline at end of file
+    return stp_bridge.health_check()
+
+def close_stp_bridge():
+    """Release the STP bridge connection pool"""
+    stp_bridge.close()
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Write Buffer Module
+
+Buffers documents in memory and writes them to MongoDB in bulk, flushing
+whenever the buffer fills up or the oldest write has waited long enough.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Write error code for a document that is already in the collection
+DUPLICATE_KEY_ERROR = 11000
+
+class WriteBuffer:
+    """Size- and time-bounded buffer that bulk-inserts documents into a collection"""
+
+    def __init__(self, collection, max_size: int = 500, max_ms: int = 100, max_retries: int = 3):
+        """Initialize the write buffer"""
+        self.collection = collection
+        self.max_size = max_size
+        self.max_ms = max_ms
+        self.max_retries = max_retries
+        self.records: List[Dict[str, Any]] = []
+        self.failures = 0
+        self.dropped = 0
+        self.task = None
+        self.closing = False
+        # Event loop primitives, recreated whenever the running loop changes
+        self._loop = None
+        self._lock = None
+        self._full = None
+
+    async def add(self, record: Dict[str, Any]):
+        """
+        Queue a document for insertion
+
+        Args:
+            record: Document to insert
+        """
+        self.records.append(record)
+        self._ensure_flusher()
+
+        # Wake the flusher rather than writing inline, so the request that
+        # fills the buffer does not pay for the bulk insert
+        if len(self.records) >= self.max_size:
+            self._full.set()
+
+    async def flush_now(self):
+        """
+        Insert all buffered documents, in chunks of at most max_size
+
+        Documents that were not written are put back at the front of the
+        buffer and the write error is re-raised.
+        """
+        self._bind_loop()
+        async with self._lock:
+            while self.records:
+                records = self.records[:self.max_size]
+                del self.records[:self.max_size]
+                try:
+                    await run_in_threadpool(self.collection.insert_many, records, ordered=False)
+                except BulkWriteError as e:
+                    # Unordered inserts write every document except the ones
+                    # reported here; duplicates are already in the collection
+                    failed = sorted(
+                        error["index"]
+                        for error in e.details.get("writeErrors", [])
+                        if error.get("code") != DUPLICATE_KEY_ERROR
+                    )
+                    self._requeue([records[index] for index in failed])
+                    raise
+                except Exception:
+                    self._requeue(records)
+                    raise
+                self.failures = 0
+
+    def _requeue(self, records: List[Dict[str, Any]]):
+        """Put unwritten documents back in the buffer, dropping them after max_retries failed flushes"""
+        if not records:
+            self.failures = 0
+            return
+
+        self.failures += 1
+        if self.failures > self.max_retries:
+            self.dropped += len(records)
+            self.failures = 0
+            logger.error(
+                f"Dropped {len(records)} documents for {self.collection.name} after "
+                f"{self.max_retries} retries ({self.dropped} dropped in total)"
+            )
+        else:
+            self.records[:0] = records
+
+    async def close(self):
+        """Stop the background flusher and write out anything still buffered"""
+        self._bind_loop()
+        if self.task and not self.task.done():
+            # Let an in-flight insert finish instead of cancelling it mid-write
+            self.closing = True
+            self._full.set()
+            await self.task
+        self.task = None
+        self.closing = False
+
+        try:
+            await self.flush_now()
+        except Exception as e:
+            logger.error(
+                f"Error flushing write buffer for {self.collection.name} on close, "
+                f"{len(self.records)} documents left unwritten: {str(e)}"
+            )
+
+    def _bind_loop(self):
+        """Create the lock and wake-up event for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A flusher left on a previous loop can never run again
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._full = asyncio.Event()
+            self.task = None
+
+    def _ensure_flusher(self):
+        """Start the background flusher if it is not already running"""
+        self._bind_loop()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run_flusher())
+
+    async def _run_flusher(self):
+        """Flush the buffer when it fills up or max_ms elapses, until it is empty"""
+        while self.records and not self.closing:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            if self.closing:
+                # close() writes out what is left
+                break
+            await self._flush_safely()
+
+    async def _flush_safely(self):
+        """Flush the buffer, logging instead of raising on write errors"""
+        try:
+            await self.flush_now()
+        except Exception as e:
+            logger.error(f"Error flushing write buffer for {self.collection.name}: {str(e)}")